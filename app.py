@@ -1,9 +1,11 @@
 import io
 import os
 import hmac
+import hashlib
+import secrets
 import datetime
 import math
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 import streamlit as st
 from PIL import Image, ImageDraw, ImageFont
@@ -25,7 +27,15 @@ APP_TITLE = "Estimating Calculator(V5)"
 
 def _init_state() -> None:
     st.session_state.setdefault("authenticated", False)
-    st.session_state.setdefault("estimate_parts", [])
+    # Line items stored column-wise: one list per field, aligned with estimate_ids
+    # (list position = display order). Use _rows_view() where per-row dicts are needed.
+    st.session_state.setdefault("_next_id", 0)
+    st.session_state.setdefault("estimate_ids", [])
+    st.session_state.setdefault("estimate_cols", {})
+    # Cache key for derived estimate data: (session token, revision). The revision is
+    # bumped on every mutation, so an unchanged estimate is never re-hashed.
+    st.session_state.setdefault("estimate_token", secrets.token_hex(8))
+    st.session_state.setdefault("estimate_rev", 0)
     st.session_state.setdefault("plate_yield_results", {})
     st.session_state.setdefault("structural_yield_results", {})
 
@@ -83,14 +93,57 @@ def require_auth() -> None:
     st.stop()
 
 
-@st.cache_data(show_spinner=False)
-def _load_aisc_once(csv_path: str) -> bool:
-    """Load AISC database once and cache it."""
+@st.cache_resource(show_spinner=False)
+def _load_aisc(csv_path: str, mtime: float) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, Any]]]:
+    """Parse the AISC database once per (path, mtime) and share the maps across sessions.
+
+    cache_resource hands back the same objects on every hit (no pickling of the large dicts).
+    `mtime` is only part of the cache key so that editing the CSV invalidates the entry.
+    """
+    # logic.load_aisc_database() is a no-op after the first attempt; re-arm it for a fresh key.
     logic.aisc_data_load_attempted = False
-    logic.AISC_TYPES_TO_LABELS_MAP = None
-    logic.AISC_LABEL_TO_PROPERTIES_MAP = None
     logic.load_aisc_database(csv_path)
-    return bool(logic.AISC_TYPES_TO_LABELS_MAP)
+    return (logic.AISC_TYPES_TO_LABELS_MAP or {}, logic.AISC_LABEL_TO_PROPERTIES_MAP or {})
+
+
+def _aisc_csv_mtime(csv_path: str) -> float:
+    try:
+        return os.path.getmtime(csv_path)
+    except OSError:
+        return 0.0
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _parse_dxf_cached(
+    sha1: str,
+    _file_bytes: bytes,
+    filename: str,
+    units: str,
+    scale: float,
+    ignore_layer_substrings: Tuple[str, ...],
+    flatten_tol: float,
+    strict_single: bool,
+):
+    """DXF parse memoized on the file's SHA-1 (the bytes themselves are not hashed by Streamlit).
+
+    cache_resource avoids deep-copying the polygons on every hit; the returned
+    DetectedPartGeometry is frozen and treated as read-only.
+    """
+    return parse_dxf_plate_single_part_geometry(
+        _file_bytes,
+        filename=filename,
+        units=units,
+        scale=scale,
+        ignore_layer_substrings=list(ignore_layer_substrings),
+        flatten_tol=flatten_tol,
+        strict_single=strict_single,
+    )
+
+
+def _parse_dxf(file_bytes: bytes, **kwargs):
+    """Hash the upload, then parse via the cache (identical uploads skip parsing entirely)."""
+    kwargs["ignore_layer_substrings"] = tuple(kwargs.get("ignore_layer_substrings") or ())
+    return _parse_dxf_cached(hashlib.sha1(file_bytes).hexdigest(), file_bytes, **kwargs)
 
 
 def _create_yield_image(sheet_layout: Dict[str, Any], scale: int = 5) -> Image.Image:
@@ -125,12 +178,58 @@ def _create_yield_image(sheet_layout: Dict[str, Any], scale: int = 5) -> Image.I
     return img
 
 
+def _new_id() -> str:
+    """Session-local row id (only used for widget keys and dict lookups)."""
+    st.session_state["_next_id"] += 1
+    return f"p{st.session_state['_next_id']}"
+
+
+def _estimate_cols() -> Dict[str, List[Any]]:
+    return st.session_state["estimate_cols"]
+
+
+def _rows_view(fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Estimate line items as per-row dicts, in display order.
+
+    `fields` restricts the view to the columns a caller actually reads, so only
+    those lists are zipped. Unset (None) fields are left out, so `r.get(k, default)`
+    behaves as it did for list-of-dict rows.
+    """
+    cols = _estimate_cols()
+    keys = [k for k in (fields if fields is not None else cols.keys()) if k in cols]
+    n = len(st.session_state["estimate_ids"])
+    if not keys:
+        return [{} for _ in range(n)]
+    return [
+        {k: v for k, v in zip(keys, vals) if v is not None}
+        for vals in zip(*(cols[k] for k in keys))
+    ]
+
+
+def _bump_estimate_rev() -> None:
+    st.session_state["estimate_rev"] += 1
+
+
+def _estimate_key() -> str:
+    return f"{st.session_state['estimate_token']}:{st.session_state['estimate_rev']}"
+
+
 def _add_part(part: Dict[str, Any]) -> None:
-    st.session_state["estimate_parts"].append(part)
+    cols = _estimate_cols()
+    n = len(st.session_state["estimate_ids"])
+    for k in part:
+        if k not in cols:
+            cols[k] = [None] * n
+    for k, col in cols.items():
+        col.append(part.get(k))
+    st.session_state["estimate_ids"].append(_new_id())
+    _bump_estimate_rev()
 
 
 def _clear_estimate() -> None:
-    st.session_state["estimate_parts"] = []
+    st.session_state["estimate_ids"] = []
+    st.session_state["estimate_cols"] = {}
+    _bump_estimate_rev()
     st.session_state["plate_yield_results"] = {}
     st.session_state["structural_yield_results"] = {}
 
@@ -151,7 +250,7 @@ def _nan_to_none(v: Any) -> Any:
 
 def _import_estimate_from_csv(uploaded_file) -> Tuple[bool, str]:
     """
-    Import an exported estimate CSV (from this app) and repopulate st.session_state["estimate_parts"].
+    Import an exported estimate CSV (from this app) and repopulate the estimate line items.
 
     The imported CSV is treated as the source of input rows; summary totals will recompute from rows.
     """
@@ -192,7 +291,11 @@ def _import_estimate_from_csv(uploaded_file) -> Tuple[bool, str]:
         rows.append(clean)
 
     # Replace current estimate
-    st.session_state["estimate_parts"] = rows
+    st.session_state["estimate_ids"] = []
+    st.session_state["estimate_cols"] = {}
+    _bump_estimate_rev()
+    for r in rows:
+        _add_part(r)
 
     # Clear yield caches (optional) - user can rerun optimizers if desired
     st.session_state["plate_yield_results"] = {}
@@ -201,8 +304,8 @@ def _import_estimate_from_csv(uploaded_file) -> Tuple[bool, str]:
     return True, f"Imported {len(rows)} line item(s)."
 
 
-def _export_csv_bytes(rows: List[Dict[str, Any]]) -> bytes:
-    if not rows:
+def _export_csv_bytes(cols: Dict[str, List[Any]]) -> bytes:
+    if not cols:
         return b""
 
     preferred_order = [
@@ -256,18 +359,36 @@ def _export_csv_bytes(rows: List[Dict[str, Any]]) -> bytes:
         "DXF Source",
     ]
 
-    all_keys = set().union(*[r.keys() for r in rows])
+    all_keys = set(cols.keys())
     header = [k for k in preferred_order if k in all_keys] + sorted([k for k in all_keys if k not in preferred_order])
 
+    # Fast path: Arrow's C++ CSV writer (pyarrow ships with Streamlit). Mixed-type
+    # columns can fail Arrow type inference; fall back to the csv module then.
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pacsv
+
+        table = pa.Table.from_pandas(pd.DataFrame({k: cols[k] for k in header}), preserve_index=False)
+        out = io.BytesIO()
+        pacsv.write_csv(table, out, write_options=pacsv.WriteOptions(delimiter=","))
+        return out.getvalue()
+    except Exception:
+        pass
+
     import csv
     buf = io.StringIO()
-    w = csv.DictWriter(buf, fieldnames=header, extrasaction="ignore")
-    w.writeheader()
-    for r in rows:
-        w.writerow(r)
+    w = csv.writer(buf)
+    w.writerow(header)
+    w.writerows(zip(*[cols[k] for k in header]))
     return buf.getvalue().encode("utf-8")
 
 
+@st.cache_data(show_spinner=False, max_entries=64, ttl=3600)
+def _csv_for(rows_key: str, _cols: Dict[str, List[Any]]) -> bytes:
+    """Serialized CSV for an estimate, cached on `rows_key` (leading underscore: `_cols` is not hashed)."""
+    return _export_csv_bytes(_cols)
+
+
 def _structural_end_perimeter_one_end_in(props: Dict[str, Any]) -> float:
     """Approximate end perimeter (inches) for ONE end of a structural shape from AISC props."""
 
@@ -338,7 +459,7 @@ def _safe_setup_key(material: Any, thickness: Any) -> Tuple[str, float]:
     return (mat, thk)
 
 
-def _calculate_setup_times(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+def _calculate_setup_times(cols: Dict[str, List[Any]]) -> Dict[str, float]:
     """
     Calculate setup times (minutes), separate from runtime:
     - Laser: Plate items whose Burn Machine Type == "Laser"
@@ -351,11 +472,16 @@ def _calculate_setup_times(rows: List[Dict[str, Any]]) -> Dict[str, float]:
     kinetic_keys = set()
     saw_keys = set()
 
-    for r in rows:
-        etype = r.get("Estimation Type")
+    n = len(next(iter(cols.values()), []))
+
+    def col(k: str) -> List[Any]:
+        return cols.get(k) or [None] * n
+
+    for etype, material, thickness, burn_type in zip(
+        col("Estimation Type"), col("Material"), col("Thickness (in)"), col("Burn Machine Type")
+    ):
         if etype == "Plate":
-            key = _safe_setup_key(r.get("Material"), r.get("Thickness (in)"))
-            burn_type = r.get("Burn Machine Type")
+            key = _safe_setup_key(material, thickness)
             if burn_type == "Laser":
                 laser_keys.add(key)
             elif burn_type == "Kinetic":
@@ -731,7 +857,6 @@ def page_plate() -> None:
 
         def _extract_step_parts_table(step_bytes: bytes, filename: str, units_label: str, scale: float, density_lb_in3: float):
             import trimesh
-            import uuid
 
             scene_or_mesh = trimesh.load(file_obj=io.BytesIO(step_bytes), file_type="step")
             to_in = _units_to_inches_factor(units_label)
@@ -778,7 +903,7 @@ def page_plate() -> None:
                 for gname, geom in scene_or_mesh.geometry.items():
                     if not isinstance(geom, trimesh.Trimesh):
                         continue
-                    row_id = str(uuid.uuid4())[:8]
+                    row_id = _new_id()
                     bw, bl, bt, vol, wt = _metrics(geom)
                     rows.append(
                         {
@@ -799,7 +924,7 @@ def page_plate() -> None:
                     )
                     meshes_by_id[row_id] = geom
             elif hasattr(scene_or_mesh, "vertices") and hasattr(scene_or_mesh, "faces"):
-                row_id = str(uuid.uuid4())[:8]
+                row_id = _new_id()
                 bw, bl, bt, vol, wt = _metrics(scene_or_mesh)
                 rows.append(
                     {
@@ -1097,7 +1222,7 @@ def page_plate() -> None:
             detected_rows = []
             for f in uploaded:
                 try:
-                    geom = parse_dxf_plate_single_part_geometry(
+                    geom = _parse_dxf(
                         f.getvalue(),
                         filename=f.name,
                         units=units_key,
@@ -1495,7 +1620,7 @@ def page_structural() -> None:
             "Supports mixing multiple stock lengths and optional quantity limits per stock length."
         )
 
-        rows = st.session_state.get("estimate_parts", [])
+        rows = _rows_view(["Estimation Type", "Length (in)", "Quantity", "Part Name"])
         cuts_with_qty = []
         for r in rows:
             if r.get("Estimation Type") != "Structural":
@@ -1718,7 +1843,7 @@ def page_welding() -> None:
         st.rerun()
 
 
-def _compute_totals(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _compute_totals(cols: Dict[str, List[Any]]) -> Dict[str, Any]:
     plate_wt = 0.0
     struct_wt = 0.0
     plt_bend_t = 0.0
@@ -1733,37 +1858,57 @@ def _compute_totals(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
     perimeter_total_in = 0.0
     structural_end_perimeter_total_in = 0.0
 
-    for r in rows:
-        fit_t += float(r.get("Total Fit Time (min)", 0.0) or 0.0)
-        roll_t += float(r.get("Total Rolling Run Time (min)", 0.0) or 0.0)
+    # One pass over just the columns totals read (no per-row dict lookups).
+    n = len(next(iter(cols.values()), []))
+
+    def col(k: str) -> List[Any]:
+        return cols.get(k) or [None] * n
+
+    for (
+        etype, burn_type, qty, per_item, fit, roll, gross, bend, drill, burn, end_perim, cut, weld_hr, weld_wire,
+    ) in zip(
+        col("Estimation Type"),
+        col("Burn Machine Type"),
+        col("Quantity"),
+        col("Perimeter (in/item)"),
+        col("Total Fit Time (min)"),
+        col("Total Rolling Run Time (min)"),
+        col("Total Gross Weight (lbs)"),
+        col("Total Bend Time (min)"),
+        col("Total Drilling Time (min)"),
+        col("Total Burning Time (min)"),
+        col("Total End Perimeter Both Ends (in)"),
+        col("Total Cutting Time (min)"),
+        col("Total Weld Time (hours)"),
+        col("Total Weld Wire (lbs)"),
+    ):
+        fit_t += float(fit or 0.0)
+        roll_t += float(roll or 0.0)
 
         try:
-            per_item = float(r.get("Perimeter (in/item)", 0.0) or 0.0)
-            qty = int(r.get("Quantity", 0) or 0)
-            perimeter_total_in += per_item * qty
+            perimeter_total_in += float(per_item or 0.0) * int(qty or 0)
         except Exception:
             pass
 
-        etype = r.get("Estimation Type")
         if etype == "Plate":
-            plate_wt += float(r.get("Total Gross Weight (lbs)", 0.0) or 0.0)
-            plt_bend_t += float(r.get("Total Bend Time (min)", 0.0) or 0.0)
-            drill_t += float(r.get("Total Drilling Time (min)", 0.0) or 0.0)
-            if r.get("Burn Machine Type") == "Laser":
-                laser_burn_t += float(r.get("Total Burning Time (min)", 0.0) or 0.0)
-            elif r.get("Burn Machine Type") == "Kinetic":
-                kinetic_burn_t += float(r.get("Total Burning Time (min)", 0.0) or 0.0)
+            plate_wt += float(gross or 0.0)
+            plt_bend_t += float(bend or 0.0)
+            drill_t += float(drill or 0.0)
+            if burn_type == "Laser":
+                laser_burn_t += float(burn or 0.0)
+            elif burn_type == "Kinetic":
+                kinetic_burn_t += float(burn or 0.0)
 
         elif etype == "Structural":
-            struct_wt += float(r.get("Total Gross Weight (lbs)", 0.0) or 0.0)
-            structural_end_perimeter_total_in += float(r.get("Total End Perimeter Both Ends (in)", 0.0) or 0.0)
-            str_cut_t += float(r.get("Total Cutting Time (min)", 0.0) or 0.0)
+            struct_wt += float(gross or 0.0)
+            structural_end_perimeter_total_in += float(end_perim or 0.0)
+            str_cut_t += float(cut or 0.0)
 
         elif etype == "Welding":
-            weld_time_hr += float(r.get("Total Weld Time (hours)", 0.0) or 0.0)
-            weld_wire_lbs += float(r.get("Total Weld Wire (lbs)", 0.0) or 0.0)
+            weld_time_hr += float(weld_hr or 0.0)
+            weld_wire_lbs += float(weld_wire or 0.0)
 
-    setup = _calculate_setup_times(rows)
+    setup = _calculate_setup_times(cols)
 
     return {
         "plate_total_gross_weight": plate_wt,
@@ -1804,14 +1949,21 @@ def _compute_totals(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+@st.cache_data(show_spinner=False, max_entries=64, ttl=3600)
+def _compute_totals_cached(rows_key: str, _cols: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """_compute_totals() memoized on the estimate key, so reruns without edits skip it."""
+    return _compute_totals(_cols)
+
+
 def page_summary() -> None:
     st.header("Summary")
-    rows = st.session_state["estimate_parts"]
-    if not rows:
+    cols = _estimate_cols()
+    if not st.session_state["estimate_ids"]:
         st.info("No parts yet. Add items in Plate / Structural / Welding.")
         return
 
-    totals = _compute_totals(rows)
+    rows_key = _estimate_key()
+    totals = _compute_totals_cached(rows_key, cols)
 
     # Keep the top row exactly the same look/ordering as before
     c1, c2, c3, c4 = st.columns(4)
@@ -1853,7 +2005,7 @@ def page_summary() -> None:
     d2.metric("Plate bending (min)", f"{totals['grand_total_plate_bend_time']:.2f}")
 
     with st.expander("Estimate line items", expanded=False):
-        st.dataframe(rows, use_container_width=True)
+        st.dataframe(pd.DataFrame(cols), use_container_width=True)
 
     # ------------------------------------------------------------
     # Plate nesting optimization (sheet cutting)
@@ -1867,7 +2019,11 @@ def page_summary() -> None:
         )
 
         # Build required plate rectangles from the estimate
-        plate_rows = [r for r in rows if str(r.get("Estimation Type", "")) == "Plate"]
+        nest_fields = [
+            "Estimation Type", "Part Name", "Quantity", "Material", "Thickness (in)",
+            "Width (in)", "Length (in)", "DXF Source", "STEP Source File",
+        ]
+        plate_rows = [r for r in _rows_view(nest_fields) if str(r.get("Estimation Type", "")) == "Plate"]
         if not plate_rows:
             st.info("No plate parts in the estimate yet.")
         else:
@@ -1993,10 +2149,12 @@ def page_summary() -> None:
                             with cols[idx % 2]:
                                 st.image(img, caption=f"Sheet {idx+1}: {sh['width']:.0f} x {sh['height']:.0f} in", use_container_width=True)
 
-    csv_bytes = _export_csv_bytes(rows)
+    # Deferred: the CSV is only serialized (or fetched from cache) when the button is clicked.
+    # The callable runs off the script thread without session state, so bind the key and a
+    # snapshot of the columns now.
     st.download_button(
         "Download CSV",
-        data=csv_bytes,
+        data=lambda k=rows_key, c={name: list(vals) for name, vals in cols.items()}: _csv_for(k, c),
         file_name=f"estimate_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv",
     )
@@ -2007,15 +2165,19 @@ def main() -> None:
     _init_state()
     require_auth()
 
-    ok = _load_aisc_once(logic.AISC_CSV_FILENAME)
-    if not ok:
+    csv_path = logic.AISC_CSV_FILENAME
+    types_to_labels, label_to_props = _load_aisc(csv_path, _aisc_csv_mtime(csv_path))
+    logic.AISC_TYPES_TO_LABELS_MAP = types_to_labels
+    logic.AISC_LABEL_TO_PROPERTIES_MAP = label_to_props
+    logic.aisc_data_load_attempted = True
+    if not types_to_labels:
         st.warning("AISC database could not be loaded. Structural tab will not work until the CSV is present.")
 
     with st.sidebar:
         st.title(APP_TITLE)
         page = st.radio("Go to", ["Plate", "Cone Calculator", "Structural", "Welding", "Summary"], index=0, key="nav_page")
         st.write("—")
-        st.write(f"Items in estimate: **{len(st.session_state['estimate_parts'])}**")
+        st.write(f"Items in estimate: **{len(st.session_state['estimate_ids'])}**")
         if st.button("Clear estimate", type="secondary", key="clear_estimate_btn"):
             _clear_estimate()
             st.rerun()
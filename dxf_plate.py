@@ -21,14 +21,20 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable, List, Dict, Any, Optional, Tuple
 
-import tempfile
+import numpy as np
 
 import ezdxf
+from ezdxf.document import Drawing
+from ezdxf.filemanagement import dxf_stream_info
+from ezdxf.lldxf.tagger import binary_tags_loader
 from ezdxf.path import make_path
 
+import shapely
+from shapely.affinity import scale as _shp_scale
 from shapely.geometry import Polygon, LineString
 from shapely.ops import unary_union, polygonize, snap
 from shapely.prepared import prep
+from shapely.strtree import STRtree
 
 from PIL import Image, ImageDraw
 import base64
@@ -74,19 +80,43 @@ def _scale_factor(units: str) -> float:
     return 1.0
 
 
-def _contains_with_tol(container: Polygon, item: Polygon, tol: float) -> bool:
-    """Robust containment with tolerance.
+def _scale_poly(p: Polygon, sf: float) -> Polygon:
+    """Uniformly scale a polygon about the origin (GEOS affine transform, no Python coord loop)."""
+    return _shp_scale(p, xfact=sf, yfact=sf, origin=(0, 0))
+
+
+def _tol_container(poly: Polygon, tol: float) -> Polygon:
+    """Container geometry for robust containment with tolerance.
 
     After flattening curves, boundaries can end up microscopically outside/inside
     due to numerical effects. Buffering the container a bit makes `contains`
-    behave as users expect.
+    behave as users expect. Buffer once per polygon and reuse the result.
     """
     try:
         if tol and tol > 0:
-            return container.buffer(tol).contains(item)
-        return container.contains(item)
+            return poly.buffer(tol)
     except Exception:
-        return False
+        pass
+    return poly
+
+
+BINARY_DXF_SENTINEL = b"AutoCAD Binary DXF"
+
+
+def _read_dxf_bytes(file_bytes: bytes):
+    """Load a DXF document from memory (no temporary file round-trip).
+
+    Mirrors ezdxf.readfile: binary DXF goes through the binary tag loader, and
+    ASCII DXF is decoded with the encoding declared by the header
+    ($DWGCODEPAGE, or UTF-8 for R2007+). Layer names drive the ignore filter,
+    so they must round-trip exactly.
+    """
+    if file_bytes.startswith(BINARY_DXF_SENTINEL):
+        return Drawing.load(binary_tags_loader(file_bytes, errors="surrogateescape"))
+    probe = io.TextIOWrapper(io.BytesIO(file_bytes), encoding="utf-8", errors="ignore")
+    info = dxf_stream_info(probe)
+    stream = io.TextIOWrapper(io.BytesIO(file_bytes), encoding=info.encoding, errors="surrogateescape")
+    return ezdxf.read(stream)
 
 
 def _layer_is_ignored(layer_name: str, ignore_substrings: Iterable[str]) -> bool:
@@ -97,6 +127,19 @@ def _layer_is_ignored(layer_name: str, ignore_substrings: Iterable[str]) -> bool
     return False
 
 
+def _flatten_path_coords(path, flatten_tol: float) -> np.ndarray:
+    """Flatten an ezdxf Path into an (n, 2) float array of XY vertices.
+
+    Filling a flat float array avoids building a Python tuple per vertex;
+    shapely 2.x accepts the array directly.
+    """
+    flat = np.fromiter(
+        (c for v in path.flattening(distance=flatten_tol) for c in (v.x, v.y)),
+        dtype=float,
+    )
+    return flat.reshape(-1, 2)
+
+
 def _polygon_from_entity(entity, flatten_tol: float) -> Optional[Polygon]:
     """Try to convert a DXF entity into a closed shapely Polygon.
 
@@ -116,17 +159,16 @@ def _polygon_from_entity(entity, flatten_tol: float) -> Optional[Polygon]:
 
     # Flatten to vertices
     try:
-        vertices = list(path.flattening(distance=flatten_tol))
+        coords = _flatten_path_coords(path, flatten_tol)
     except Exception:
         return None
 
-    if len(vertices) < 4:
+    if len(coords) < 4:
         return None
 
-    coords = [(float(v.x), float(v.y)) for v in vertices]
     # Ensure closed
-    if coords[0] != coords[-1]:
-        coords.append(coords[0])
+    if not np.array_equal(coords[0], coords[-1]):
+        coords = np.vstack([coords, coords[:1]])
 
     try:
         poly = Polygon(coords)
@@ -139,7 +181,7 @@ def _polygon_from_entity(entity, flatten_tol: float) -> Optional[Polygon]:
     return poly
 
 
-def _collect_closed_polygons(doc, ignore_substrings: Iterable[str], flatten_tol: float) -> List[Polygon]:
+def _collect_closed_polygons(entities, ignore_substrings: Iterable[str], flatten_tol: float) -> List[Polygon]:
     """Collect polygons from DXF geometry.
 
     We prefer a robust approach that works for DXFs where the part outline is
@@ -152,7 +194,6 @@ def _collect_closed_polygons(doc, ignore_substrings: Iterable[str], flatten_tol:
 
     This greatly reduces "false parts" where only holes are closed entities.
     """
-    msp = doc.modelspace()
     segments: List[LineString] = []
 
     SKIP_TYPES = {"TEXT", "MTEXT", "DIMENSION", "LEADER", "MLEADER", "HATCH"}
@@ -171,18 +212,17 @@ def _collect_closed_polygons(doc, ignore_substrings: Iterable[str], flatten_tol:
         if path is None:
             return
         try:
-            verts = list(path.flattening(distance=flatten_tol))
+            coords = _flatten_path_coords(path, flatten_tol)
         except Exception:
             return
-        if len(verts) < 2:
+        if len(coords) < 2:
             return
-        coords = [(float(v.x), float(v.y)) for v in verts]
         try:
             segments.append(LineString(coords))
         except Exception:
             return
 
-    for e in msp:
+    for e in entities:
         if e.dxftype() == "INSERT":
             # Skip common SolidWorks/annotation blocks (notes, center marks, etc.)
             try:
@@ -237,8 +277,9 @@ def _collect_closed_polygons(doc, ignore_substrings: Iterable[str], flatten_tol:
 def _assign_outers_and_holes(polys: List[Polygon], tol: float) -> List[Tuple[Polygon, List[Polygon]]]:
     """Return list of (outer_poly, holes[]) for each detected part.
 
-    This uses an "enclosing count" approach (how many other polygons contain a
-    polygon) with a small tolerance buffer to avoid false "not contained" cases.
+    Polygons not contained by any larger outer are outers; everything else is
+    a hole of the smallest outer containing it. Containment uses a small
+    tolerance buffer to avoid false "not contained" cases.
     """
     if not polys:
         return []
@@ -252,40 +293,64 @@ def _assign_outers_and_holes(polys: List[Polygon], tol: float) -> List[Tuple[Pol
         p0 = polys_sorted[0]
         p1 = polys_sorted[1]
         if p0.area > 4.0 * p1.area:
-            contains_n = sum(1 for p in polys_sorted[1:] if _contains_with_tol(p0, p, tol))
+            p0_prepped = prep(_tol_container(p0, tol))
+
+            def _in_p0(p: Polygon) -> bool:
+                try:
+                    return p0_prepped.contains(p)
+                except Exception:
+                    return False
+
+            contains_n = sum(1 for p in polys_sorted[1:] if _in_p0(p))
             if contains_n >= int(0.6 * (len(polys_sorted) - 1)):
                 polys_sorted = polys_sorted[1:]
 
-    # Precompute containment counts
-    containment_count: List[int] = [0] * len(polys_sorted)
+    # Containers are buffered once; the STRtree limits `contains` tests to
+    # candidates whose bounding boxes intersect (instead of every pair), and
+    # each candidate set is tested in one vectorized GEOS call.
+    containers = np.array([_tol_container(p, tol) for p in polys_sorted], dtype=object)
+    areas = np.array([p.area for p in polys_sorted], dtype=float)
+    bboxes = shapely.bounds(containers)  # (n, 4): minx, miny, maxx, maxy
+    tree = STRtree(containers)
+
+    def _bbox_encloses(candidates: np.ndarray, item: Polygon) -> np.ndarray:
+        # A container can only contain `item` if its bbox encloses item's bbox.
+        # STRtree.query only guarantees the boxes intersect.
+        px0, py0, px1, py1 = item.bounds
+        b = bboxes[candidates]
+        return (b[:, 0] <= px0) & (b[:, 1] <= py0) & (b[:, 2] >= px1) & (b[:, 3] >= py1)
+
+    def _contained_mask(candidates: np.ndarray, item: Polygon) -> np.ndarray:
+        try:
+            return np.asarray(shapely.contains(candidates, item), dtype=bool)
+        except Exception:
+            return np.zeros(len(candidates), dtype=bool)
+
+    # Single pass in area-descending order: a polygon not contained by any
+    # (larger) outer found so far is a new outer; otherwise it is a hole of the
+    # smallest outer containing it. Outer membership is tracked by index, so no
+    # geometric `equals` checks are needed.
+    is_outer = np.zeros(len(polys_sorted), dtype=bool)
+    outer_slot = np.full(len(polys_sorted), -1, dtype=int)
+    groups: List[Tuple[Polygon, List[Polygon]]] = []
     for i, p in enumerate(polys_sorted):
-        for j, q in enumerate(polys_sorted):
-            if i == j:
-                continue
-            # Only larger areas can contain smaller ones (fast prune)
-            if q.area <= p.area:
-                continue
-            if _contains_with_tol(q, p, tol):
-                containment_count[i] += 1
-
-    # Outers are those not contained by any other polygon
-    outers: List[Polygon] = [p for p, c in zip(polys_sorted, containment_count) if c == 0]
-
-    # Assign holes to the smallest outer that contains them
-    holes_by_outer: Dict[int, List[Polygon]] = {i: [] for i in range(len(outers))}
-    for p in polys_sorted:
-        # Skip if it's an outer
-        if any(p.equals(o) for o in outers):
-            continue
-        containing: List[Tuple[int, float]] = []
-        for i, o in enumerate(outers):
-            if _contains_with_tol(o, p, tol):
-                containing.append((i, o.area))
-        if containing:
-            containing.sort(key=lambda x: x[1])
-            holes_by_outer[containing[0][0]].append(p)
+        cand = tree.query(p)
+        # Only larger areas can contain smaller ones (fast prune)
+        cand = cand[is_outer[cand] & (areas[cand] > areas[i])]
+        cand = np.sort(cand[_bbox_encloses(cand, p)])
+        if cand.size:
+            cand = cand[_contained_mask(containers[cand], p)]
+        if cand.size:
+            groups[outer_slot[int(cand[np.argmin(areas[cand])])]][1].append(p)
+        else:
+            # Outers are the only containers ever tested; prepare each once so
+            # every later shapely.contains against it uses the GEOS prepared path.
+            shapely.prepare(containers[i])
+            is_outer[i] = True
+            outer_slot[i] = len(groups)
+            groups.append((p, []))
 
-    return [(outers[i], holes_by_outer[i]) for i in range(len(outers))]
+    return groups
 
 
 def parse_dxf_plate_parts(
@@ -316,13 +381,9 @@ def parse_dxf_plate_parts(
         scale = 1.0
     sf = _scale_factor(units) * (scale if scale > 0 else 1.0)
 
-    # ezdxf is most reliable reading from a temporary file
-    with tempfile.NamedTemporaryFile(suffix=".dxf", delete=True) as tmp:
-        tmp.write(file_bytes)
-        tmp.flush()
-        doc = ezdxf.readfile(tmp.name)
+    entities = _read_dxf_bytes(file_bytes).modelspace()
 
-    polys = _collect_closed_polygons(doc, ignore_substrings=ignore, flatten_tol=flatten_tol)
+    polys = _collect_closed_polygons(entities, ignore_substrings=ignore, flatten_tol=flatten_tol)
     # Use a small tolerance for containment tests. Tie it to flatten_tol.
     tol = max(float(flatten_tol) * 2.0, 1e-6)
     groups = _assign_outers_and_holes(polys, tol=tol)
@@ -335,14 +396,8 @@ def parse_dxf_plate_parts(
         outer_s = outer
         holes_s = holes
         if sf != 1.0:
-            # shapely scale via manual coordinate scaling
-            def _scale_poly(p: Polygon) -> Polygon:
-                x, y = p.exterior.coords.xy
-                coords = [(xi * sf, yi * sf) for xi, yi in zip(x, y)]
-                return Polygon(coords)
-
-            outer_s = _scale_poly(outer)
-            holes_s = [_scale_poly(h) for h in holes]
+            outer_s = _scale_poly(outer, sf)
+            holes_s = [_scale_poly(h, sf) for h in holes]
 
         minx, miny, maxx, maxy = outer_s.bounds
         bbox_w = float(maxx - minx)
@@ -407,12 +462,9 @@ def parse_dxf_plate_single_part(
         scale = 1.0
     sf = _scale_factor(units) * (scale if scale > 0 else 1.0)
 
-    with tempfile.NamedTemporaryFile(suffix=".dxf", delete=True) as tmp:
-        tmp.write(file_bytes)
-        tmp.flush()
-        doc = ezdxf.readfile(tmp.name)
+    entities = _read_dxf_bytes(file_bytes).modelspace()
 
-    polys = _collect_closed_polygons(doc, ignore_substrings=ignore, flatten_tol=flatten_tol)
+    polys = _collect_closed_polygons(entities, ignore_substrings=ignore, flatten_tol=flatten_tol)
     tol = max(float(flatten_tol) * 2.0, 1e-6)
     groups = _assign_outers_and_holes(polys, tol=tol)
 
@@ -429,13 +481,8 @@ def parse_dxf_plate_single_part(
     outer_s = outer
     holes_s = holes
     if sf != 1.0:
-        def _scale_poly(p: Polygon) -> Polygon:
-            x, y = p.exterior.coords.xy
-            coords = [(xi * sf, yi * sf) for xi, yi in zip(x, y)]
-            return Polygon(coords)
-
-        outer_s = _scale_poly(outer)
-        holes_s = [_scale_poly(h) for h in holes]
+        outer_s = _scale_poly(outer, sf)
+        holes_s = [_scale_poly(h, sf) for h in holes]
 
     minx, miny, maxx, maxy = outer_s.bounds
     bbox_w = float(maxx - minx)
@@ -475,12 +522,9 @@ def parse_dxf_plate_single_part_geometry(
         scale = 1.0
     sf = _scale_factor(units) * (scale if scale > 0 else 1.0)
 
-    with tempfile.NamedTemporaryFile(suffix=".dxf", delete=True) as tmp:
-        tmp.write(file_bytes)
-        tmp.flush()
-        doc = ezdxf.readfile(tmp.name)
+    entities = _read_dxf_bytes(file_bytes).modelspace()
 
-    polys = _collect_closed_polygons(doc, ignore_substrings=ignore, flatten_tol=flatten_tol)
+    polys = _collect_closed_polygons(entities, ignore_substrings=ignore, flatten_tol=flatten_tol)
     tol = max(float(flatten_tol) * 2.0, 1e-6)
     groups = _assign_outers_and_holes(polys, tol=tol)
 
@@ -496,13 +540,8 @@ def parse_dxf_plate_single_part_geometry(
     outer_s = outer
     holes_s = holes
     if sf != 1.0:
-        def _scale_poly(p: Polygon) -> Polygon:
-            x, y = p.exterior.coords.xy
-            coords = [(xi * sf, yi * sf) for xi, yi in zip(x, y)]
-            return Polygon(coords)
-
-        outer_s = _scale_poly(outer)
-        holes_s = [_scale_poly(h) for h in holes]
+        outer_s = _scale_poly(outer, sf)
+        holes_s = [_scale_poly(h, sf) for h in holes]
 
     minx, miny, maxx, maxy = outer_s.bounds
     bbox_w = float(maxx - minx)